@@ -1,79 +1,118 @@
 # ==============================
 # app_pii_inspector.py (Streamlit)
 # ==============================
+import bisect
+import functools
 import re
-from dataclasses import dataclass
-from typing import Callable, List, Optional
+import threading
+from dataclasses import dataclass, replace
+from operator import mul
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
 import streamlit as st
 
+try:  # 선택 의존성: google-re2 (없으면 표준 re만 사용)
+    import re2
+except ImportError:
+    re2 = None
+try:  # 선택 의존성: hyperscan (설치되어 있으면 RE2보다 우선)
+    import hyperscan
+except ImportError:
+    hyperscan = None
+try:  # 선택 의존성: ahocorasick_rs (계좌 키워드 탐색)
+    import ahocorasick_rs
+except ImportError:
+    ahocorasick_rs = None
+
 # ---------- 공통 유틸 ----------
-def luhn_check(num: str) -> bool:
-    ds = [int(d) for d in re.sub(r"\D", "", num)]
-    if len(ds) < 13:
-        return False
-    s, alt = 0, False
-    for d in reversed(ds):
-        v = d * 2 if alt else d
-        if alt and v > 9:
-            v -= 9
-        s += v
-        alt = not alt
+# 숫자 사이 구분자: 하이픈과 공백. re.ASCII의 \s는 ASCII 공백뿐이므로 워드·HWP에서 붙여넣은 텍스트에 흔한
+# 나머지 유니코드 공백(NBSP, U+2009, 전각 공백 등)과 폭 없는 공백(U+200B)을 직접 나열
+_UNICODE_SPACES = r"\x85\xa0\u1680\u2000-\u200b\u2028\u2029\u202f\u205f\u3000"
+_SEP = r"[-\s\x1c-\x1f" + _UNICODE_SPACES + "]"
+# 숫자 추출용 삭제 테이블 (숫자 패턴은 re.ASCII라 매치에는 ASCII 문자와 구분 공백만 들어옴)
+_SEP_CHARS = "".join(re.findall(_SEP, "".join(map(chr, range(0x3001)))))
+_STRIP_NON_DIGIT = str.maketrans("", "", "".join(chr(c) for c in range(128) if not chr(c).isdigit()) + _SEP_CHARS)
+# 공백 삭제 테이블 (정규식 \s와 같은 문자 집합: str.isspace, 최대 U+3000)
+_STRIP_WS = str.maketrans("", "", "".join(c for c in map(chr, range(0x3001)) if c.isspace()))
+_DIGIT_RE = re.compile(r"\d", re.ASCII)
+
+# 룬 체크섬의 짝수 자리(두 배, 9 초과 시 -9) 값으로 바꾸는 bytes.translate 테이블 ('0'~'9' 외에는 그대로)
+_LUHN_DOUBLED = bytes(range(48)) + bytes(2 * d - 9 if 2 * d > 9 else 2 * d for d in range(10)) + bytes(range(58, 256))
+
+# 숫자만 남은 문자열에 대한 룬 합 검사 (길이 검사는 호출부에서).
+# 자리별 파이썬 루프 없이 translate + sum(bytes)로 C 수준에서 처리
+def _luhn_digits(raw: str) -> bool:
+    ds = raw.encode("ascii")
+    odd = ds[-1::-2]
+    s = sum(odd) - 48 * len(odd) + sum(ds[-2::-2].translate(_LUHN_DOUBLED))
     return s % 10 == 0
 
+# 숫자만 남긴 ASCII 문자열. 삭제 테이블은 ASCII만 지우므로 비ASCII 문자(한글, 전각 숫자 등)가 남으면
+# 유니코드 숫자만 골라 ASCII 숫자로 바꾼다 (기존 \D 제거와 같은 결과, 룰 매치는 ASCII라 앞의 빠른 경로만 탐)
+def _ascii_digits(num: str) -> str:
+    raw = num.translate(_STRIP_NON_DIGIT)
+    if raw.isascii():
+        return raw
+    return "".join(str(int(c)) for c in raw if c.isdecimal())
+
+def luhn_check(num: str) -> bool:
+    raw = _ascii_digits(num)
+    return 13 <= len(raw) <= 19 and _luhn_digits(raw)
+
+# 카드 룰 검증기
+def card_validator(m: re.Match) -> bool:
+    return luhn_check(m.group(0))
+
 def keep_tail_mask(s: str, keep: int = 4, mask_char: str = "*") -> str:
-    s2 = re.sub(r"\s", "", s)
+    s2 = s.translate(_STRIP_WS)
     return (mask_char * (len(s2) - keep) + s2[-keep:]) if len(s2) > keep else s
 
 # 사업자등록번호 체크섬 (10자리)
+_BRN_WEIGHTS = (1, 3, 7, 1, 3, 7, 1, 3, 5)
+# 바이트 값 그대로 가중합한 뒤 '0'(48) 오프셋을 한 번에 뺌
+_BRN_OFFSET = 48 * sum(_BRN_WEIGHTS)
+
 def brn_check(num: str) -> bool:
-    ds = [int(d) for d in re.sub(r"\D", "", num)]
+    ds = _ascii_digits(num).encode("ascii")
     if len(ds) != 10:
         return False
-    w = [1,3,7,1,3,7,1,3,5]
-    s = sum(d*w[i] for i, d in enumerate(ds[:9]))
-    s += (ds[8]*5)//10
+    s = sum(map(mul, ds, _BRN_WEIGHTS)) - _BRN_OFFSET
+    s += ((ds[8] - 48) * 5) // 10
     check = (10 - (s % 10)) % 10
-    return check == ds[9]
-
-# 13자리(또는 6-7) 앞 6이 YYMMDD 형태인지 빠른 판별 (CRN과 RRN 구분)
-def looks_like_rrn_ymd(num13: str) -> bool:
-    n = re.sub(r"\D", "", num13)
-    if len(n) != 13:
-        return False
-    try:
-        mm = int(n[2:4]); dd = int(n[4:6])
-    except ValueError:
-        return False
-    return 1 <= mm <= 12 and 1 <= dd <= 31
+    return check == ds[9] - 48
 
 # ---------- 패턴들 ----------
 # 휴대폰
-PAT_MOBILE = re.compile(r"\b(01[016789])[-\s]?\d{3,4}[-\s]?\d{4}\b")
+PAT_MOBILE = re.compile(r"\b(01[016789])" + _SEP + r"?\d{3,4}" + _SEP + r"?\d{4}\b", re.ASCII)
 # 유선(서울)
-PAT_LAND_SEOUL = re.compile(r"\b(02)[-\s]?\d{3,4}[-\s]?\d{4}\b")
+PAT_LAND_SEOUL = re.compile(r"\b(02)" + _SEP + r"?\d{3,4}" + _SEP + r"?\d{4}\b", re.ASCII)
 # 유선(지방)
-PAT_LAND_OTHERS = re.compile(r"\b(0(?:3[1-3]|4[1-4]|5[1-5]|6[1-4]))[-\s]?\d{3,4}[-\s]?\d{4}\b")
+PAT_LAND_OTHERS = re.compile(r"\b(0(?:3[1-3]|4[1-4]|5[1-5]|6[1-4]))" + _SEP + r"?\d{3,4}" + _SEP + r"?\d{4}\b", re.ASCII)
 # 주민등록번호(형식)
-PAT_RRN = re.compile(r"\b\d{2}(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])[-]?\d{7}\b")
+PAT_RRN = re.compile(r"\b\d{2}(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])[-]?\d{7}\b", re.ASCII)
 # 이메일
 PAT_EMAIL = re.compile(r"\b([A-Za-z0-9._%+-]+)@([A-Za-z0-9.-]+\.[A-Za-z]{2,})\b")
-# 카드번호(룬검증)
-PAT_CARD = re.compile(r"\b(?:\d[ -]?){13,19}\b")
+# 카드번호(룬검증): 구분자는 숫자 사이에만 (끝에 붙는 구분자·되추적 조합이 없음)
+PAT_CARD = re.compile(r"\b\d(?:[ -]?\d){12,18}\b", re.ASCII)
 # 여권(대한민국 일반형 포함)
-PAT_PASSPORT = re.compile(r"\b([MSRHD]\d{8}|[A-Z]{2}\d{7})\b")
+PAT_PASSPORT = re.compile(r"\b([MSRHD]\d{8}|[A-Z]{2}\d{7})\b", re.ASCII)
 # 운전면허(국내 형식)
-PAT_DRIVER = re.compile(r"\b\d{2}-\d{2}-\d{6}-\d{2}\b|\b\d{2}-\d{6}-\d{2}\b")
+PAT_DRIVER = re.compile(r"\b\d{2}-\d{2}-\d{6}-\d{2}\b|\b\d{2}-\d{6}-\d{2}\b", re.ASCII)
 # 계좌 키워드/번호
-KEYWORD_ACCT = re.compile(r"(계좌|account|입금|송금|bank)", re.IGNORECASE)
-PAT_ACCT_NUM = re.compile(r"\b\d{10,14}\b|\b\d{2,6}-\d{2,6}-\d{2,6}\b")
+ACCT_KEYWORDS = ("계좌", "account", "입금", "송금", "bank")
+KEYWORD_ACCT = re.compile("(" + "|".join(ACCT_KEYWORDS) + ")", re.IGNORECASE)
+PAT_ACCT_NUM = re.compile(r"\b\d{10,14}\b|\b\d{2,6}-\d{2,6}-\d{2,6}\b", re.ASCII)
 # 사업자등록번호 10자리
-PAT_BRN = re.compile(r"\b\d{3}[-\s]?\d{2}[-\s]?\d{5}\b")
-# 법인등록번호 13자리(형식), RRN처럼 보이면 제외
-PAT_CRN = re.compile(r"\b\d{6}[-\s]?\d{7}\b")
+PAT_BRN = re.compile(r"\b\d{3}" + _SEP + r"?\d{2}" + _SEP + r"?\d{5}\b", re.ASCII)
+# 법인등록번호 13자리(형식), 앞 6자리가 YYMMDD(RRN 형태)면 전방탐색으로 제외
+PAT_CRN = re.compile(r"\b(?!\d{2}(?:0[1-9]|1[0-2])(?:0[1-9]|[12]\d|3[01]))\d{6}" + _SEP + r"?\d{7}\b", re.ASCII)
 # 연구과제번호: 202[0-9]000\d{2}[A-Z]
-PAT_PROJECT = re.compile(r"\b202[0-9]000\d{2}[A-Z]\b")
+PAT_PROJECT = re.compile(r"\b202[0-9]000\d{2}[A-Z]\b", re.ASCII)
 # CRN 키워드(선택 강화)
 KEYWORD_CRN = re.compile(r"(법인등록번호|법인번호|corporate\s*registration)", re.IGNORECASE)
+# 카드/운전면허 키워드(선택: 키워드 근접에서만 검출)
+KEYWORD_CARD = re.compile(r"(카드|card|신용|신한|visa|master)", re.IGNORECASE)
+# DL은 대문자 단어로만 (handle, middle 같은 영단어 안의 dl 제외, ASCII 경계라 "DL번호"는 허용)
+KEYWORD_DL = re.compile(r"(면허|driver'?s? licen[cs]e|(?a-i:\bDL\b))", re.IGNORECASE)
 
 # ---------- 룰/마스킹 ----------
 @dataclass
@@ -83,14 +122,24 @@ class Rule:
     mask_fn: Optional[Callable[[re.Match], str]] = None
     validator: Optional[Callable[[re.Match], bool]] = None
     color: str = "#ffd54f"
+    # 빠른 사전 판별: 숫자가 있어야 매치 가능한지, 반드시 나타나야 하는 리터럴(하나 이상)
+    needs_digit: bool = False
+    literals: Tuple[str, ...] = ()
+    # (선택) 키워드 뒤 window 안에서만 검출
+    keyword: Optional[re.Pattern] = None
+    keyword_window: int = 60
+    # 매치가 [0-9A-Za-z._%+-] 중 하나로 시작하고 ASCII 문자와 구분 공백(_SEP)만으로 이루어지는지
+    # (= _HOT_SLAB_RE 구간 안에 들어감, 한글 본문 같은 비ASCII 구간 건너뛰기에 사용).
+    # 잘못 켜면 매치를 놓치므로 기본은 꺼 두고 확인된 룰에서만 켬
+    in_hot_slab: bool = False
 
 def mask_mobile(m: re.Match) -> str:
-    tail2 = re.sub(r"\D", "", m.group(0))[-2:]
+    tail2 = m.group(0).translate(_STRIP_NON_DIGIT)[-2:]
     return f"TEL[***-****-**{tail2}]"
 
 def mask_landline(m: re.Match) -> str:
     area = m.group(1)
-    tail2 = re.sub(r"\D", "", m.group(0))[-2:]
+    tail2 = m.group(0).translate(_STRIP_NON_DIGIT)[-2:]
     return f"TEL[{area}-***-**{tail2}]"
 
 def mask_rrn(m: re.Match) -> str:
@@ -102,11 +151,9 @@ def mask_email(m: re.Match) -> str:
     masked_local = (local[0] + "*" * (len(local) - 1)) if len(local) > 1 else "*"
     return f"EMAIL[{masked_local}@{domain}]"
 
+# 룬 검증은 룰의 validator(card_validator)가 스캔 중에 이미 마쳤으므로 다시 하지 않음
 def mask_card(m: re.Match) -> str:
-    raw = m.group(0)
-    if not luhn_check(raw):
-        return raw
-    last4 = re.sub(r"\D", "", raw)[-4:]
+    last4 = m.group(0).translate(_STRIP_NON_DIGIT)[-4:]
     return f"CARD[**** **** **** {last4}]"
 
 def mask_passport(m: re.Match) -> str:
@@ -115,124 +162,352 @@ def mask_passport(m: re.Match) -> str:
 
 def mask_driver(m: re.Match) -> str:
     raw = m.group(0)
-    return f"DL[{keep_tail_mask(re.sub(r'\\D','', raw), 2)}]"
+    return f"DL[{keep_tail_mask(raw.translate(_STRIP_NON_DIGIT), 2)}]"
 
 def mask_brn(m: re.Match) -> str:
-    return f"BRN[***-**-**{re.sub(r'\\D','', m.group(0))[-3:]}]"
+    return f"BRN[***-**-**{m.group(0).translate(_STRIP_NON_DIGIT)[-3:]}]"
 
 def mask_crn(m: re.Match) -> str:
-    raw = re.sub(r"\D", "", m.group(0))
+    raw = m.group(0).translate(_STRIP_NON_DIGIT)
     return f"CRN[******-****{raw[-3:]}]"
 
 def mask_project(m: re.Match) -> str:
     raw = m.group(0)
     return f"PRJ[{raw[:7]}***]"
 
-def default_rules() -> List[Rule]:
-    return [
-        Rule("휴대폰(모바일)", PAT_MOBILE, mask_fn=mask_mobile, color="#c8e6c9"),
-        Rule("유선(서울 02)", PAT_LAND_SEOUL, mask_fn=mask_landline, color="#d0f0fd"),
-        Rule("유선(지방 0xx)", PAT_LAND_OTHERS, mask_fn=mask_landline, color="#e6f7ff"),
-        Rule("주민등록번호", PAT_RRN, mask_fn=mask_rrn, color="#ffecb3"),
-        Rule("이메일", PAT_EMAIL, mask_fn=mask_email, color="#bbdefb"),
-        Rule("카드번호(룬검증)", PAT_CARD, mask_fn=mask_card, validator=lambda m: luhn_check(m.group(0)), color="#ffcdd2"),
-        Rule("여권", PAT_PASSPORT, mask_fn=mask_passport, color="#e1bee7"),
-        Rule("운전면허", PAT_DRIVER, mask_fn=mask_driver, color="#d7ccc8"),
-        Rule("사업자등록번호(BRN)", PAT_BRN, mask_fn=mask_brn, validator=lambda m: brn_check(m.group(0)), color="#fff0b3"),
-        Rule("법인등록번호(CRN)", PAT_CRN, mask_fn=mask_crn, validator=lambda m: not looks_like_rrn_ymd(m.group(0)), color="#e0f7fa"),
-        Rule("연구과제번호(ProjectID)", PAT_PROJECT, mask_fn=mask_project, color="#f0b3ff"),
-    ]
+def mask_account(m: re.Match) -> str:
+    return f"ACCT[{keep_tail_mask(m.group(0).translate(_STRIP_NON_DIGIT), 4)}]"
+
+# 기본 룰은 모듈 로드 시 한 번만 만들고 공유 (수정되지 않도록 튜플)
+_DEFAULT_RULES: Tuple[Rule, ...] = (
+    Rule("휴대폰(모바일)", PAT_MOBILE, mask_fn=mask_mobile, color="#c8e6c9", needs_digit=True, in_hot_slab=True, literals=("01",)),
+    Rule("유선(서울 02)", PAT_LAND_SEOUL, mask_fn=mask_landline, color="#d0f0fd", needs_digit=True, in_hot_slab=True, literals=("02",)),
+    Rule("유선(지방 0xx)", PAT_LAND_OTHERS, mask_fn=mask_landline, color="#e6f7ff", needs_digit=True, in_hot_slab=True),
+    Rule("주민등록번호", PAT_RRN, mask_fn=mask_rrn, color="#ffecb3", needs_digit=True, in_hot_slab=True),
+    Rule("이메일", PAT_EMAIL, mask_fn=mask_email, color="#bbdefb", in_hot_slab=True, literals=("@",)),
+    Rule("카드번호(룬검증)", PAT_CARD, mask_fn=mask_card, validator=card_validator, color="#ffcdd2", needs_digit=True, in_hot_slab=True, keyword=KEYWORD_CARD),
+    Rule("여권", PAT_PASSPORT, mask_fn=mask_passport, color="#e1bee7", needs_digit=True, in_hot_slab=True),
+    Rule("운전면허", PAT_DRIVER, mask_fn=mask_driver, color="#d7ccc8", needs_digit=True, in_hot_slab=True, literals=("-",), keyword=KEYWORD_DL),
+    Rule("사업자등록번호(BRN)", PAT_BRN, mask_fn=mask_brn, validator=lambda m: brn_check(m.group(0)), color="#fff0b3", needs_digit=True, in_hot_slab=True),
+    Rule("법인등록번호(CRN)", PAT_CRN, mask_fn=mask_crn, color="#e0f7fa", needs_digit=True, in_hot_slab=True),
+    Rule("연구과제번호(ProjectID)", PAT_PROJECT, mask_fn=mask_project, color="#f0b3ff", needs_digit=True, in_hot_slab=True, literals=("202",)),
+)
+DEFAULT_RULE_NAMES: Tuple[str, ...] = tuple(r.name for r in _DEFAULT_RULES)
+
+def default_rules() -> Tuple[Rule, ...]:
+    return _DEFAULT_RULES
+
+# 키워드 근접 룰: 계좌번호(항상 키워드 근접), 법인등록번호(선택 강화). find_spans에서 기본 룰과 함께 한 번에 스캔
+ACCOUNT_RULE = Rule("계좌(키워드근접)", PAT_ACCT_NUM, mask_fn=mask_account, color="#ffe082", needs_digit=True, in_hot_slab=True, keyword=KEYWORD_ACCT, keyword_window=50)
+CRN_KEYWORD_RULE = Rule("법인등록번호(CRN)", PAT_CRN, mask_fn=mask_crn, color="#e0f7fa", needs_digit=True, in_hot_slab=True, keyword=KEYWORD_CRN, keyword_window=50)
 
 # ---------- 검출/표기 ----------
-@dataclass
-class Span:
+# 매치마다 하나씩 생기므로 가벼운 NamedTuple 사용
+class Span(NamedTuple):
     rname: str
     start: int
     end: int
 
-def find_spans(text: str, rules: List[Rule], use_account_near_keyword: bool = True, account_window: int = 50, use_crn_keyword: bool = False) -> List[Span]:
-    spans: List[Span] = []
+# 룰 패턴 전체를 하나의 alternation으로 합친 스캔용 패턴 (re.ASCII 패턴은 (?a:...)로 플래그 유지).
+# named=True면 i번째 룰을 이름 있는 그룹 r{i}로 감싸 매치된 대안을 lastgroup으로 알 수 있게 함
+# (캡처 그룹은 search를 느리게 하므로 후보 위치를 찾는 스캔에는 쓰지 않음)
+def build_combined(rules: List[Rule], named: bool = False) -> re.Pattern:
+    return _combined_pattern(tuple(r.pattern for r in rules), named)
+
+# Streamlit은 위젯 조작마다 스크립트를 다시 실행하므로 lru_cache 대신 cache_resource로 재실행 간에도 재사용
+@st.cache_resource(show_spinner=False)
+def _combined_pattern(patterns: Tuple[re.Pattern, ...], named: bool = False) -> re.Pattern:
+    alts = [f"(?a:{p.pattern})" if p.flags & re.ASCII else f"(?:{p.pattern})" for p in patterns]
+    if named:
+        alts = [f"(?P<r{i}>{a})" for i, a in enumerate(alts)]
+    return re.compile("|".join(alts))
+
+# (선택) RE2 Set / Hyperscan DB로 텍스트 전체를 한 번 훑어 매치가 없는 룰을 미리 제외.
+# 두 엔진 모두 \d, \s, \b가 ASCII 기준이므로 re.ASCII로 컴파일된 패턴만 거르고 나머지는 그대로 둔다.
+# 전방/후방탐색은 두 엔진 모두 지원하지 않으므로 떼어낸 상위 집합 패턴으로 존재 여부만 본다
+_LOOKAROUND_RE = re.compile(r"\(\?<?[=!](?:[^()]|\([^()]*\))*\)")
+# RE2의 \s에는 \v가 없으므로(파이썬 re.ASCII는 [\t\n\v\f\r ]) 문자를 나열해 넘김.
+# PCRE 계열(Hyperscan)의 \v는 세로 공백 전체라 \x0b로 적고, 두 엔진 모두 모르는 \uXXXX는 \x{XXXX}로 바꿈
+_ESCAPE_RE = re.compile(r"\\u[0-9A-Fa-f]{4}|\\.")
+_CLASS_OR_ESCAPE_RE = re.compile(r"\[(?:\\.|[^\\\]])*\]|" + _ESCAPE_RE.pattern)
+_ASCII_SPACES = r"\t\n\x0b\f\r "
+
+def _engine_escape(e: str) -> str:
+    if e == r"\s":
+        return _ASCII_SPACES
+    if e.startswith(r"\u"):
+        return r"\x{" + e[2:] + "}"
+    return e
+
+def _engine_token(tok: re.Match) -> str:
+    t = tok.group(0)
+    if t.startswith("["):
+        return _ESCAPE_RE.sub(lambda e: _engine_escape(e.group(0)), t)
+    return f"[{_ASCII_SPACES}]" if t == r"\s" else _engine_escape(t)
+
+def _prefilter_pattern(r: Rule) -> Optional[str]:
+    if not r.pattern.flags & re.ASCII:
+        return None
+    p = _LOOKAROUND_RE.sub("", r.pattern.pattern)
+    if "(?=" in p or "(?!" in p or "(?<" in p:
+        return None
+    return _CLASS_OR_ESCAPE_RE.sub(_engine_token, p)
+
+@st.cache_resource(show_spinner=False)
+def _re2_set(patterns: Tuple[str, ...]):
+    rs = re2.Set.SearchSet()
+    for p in patterns:
+        rs.Add(p)
+    rs.Compile()
+    return rs
+
+# DB는 세션 간 공유되지만 scratch는 동시에 두 스캔이 쓸 수 없으므로 스레드(=Streamlit 세션 실행)마다 따로 둔다
+@st.cache_resource(show_spinner=False)
+def _hs_db(patterns: Tuple[str, ...]):
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    db.compile(
+        expressions=[p.encode() for p in patterns],
+        ids=list(range(len(patterns))),
+        # 구분 공백(\xa0, \x{3000} 등)을 코드 포인트로 해석하도록 UTF-8 모드 (\d, \s, \b는 그대로 ASCII)
+        flags=hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8,
+    )
+    return db, threading.local()
+
+def _hs_scratch(patterns: Tuple[str, ...]):
+    db, local = _hs_db(patterns)
+    scratch = getattr(local, "scratch", None)
+    if scratch is None:
+        scratch = local.scratch = hyperscan.Scratch(db)
+    return db, scratch
+
+def _present_patterns(text: str, patterns: Tuple[str, ...]) -> set:
+    if hyperscan is not None:
+        hits = set()
+        def on_match(pid, frm, to, flags, ctx):
+            hits.add(pid)
+            return len(hits) == len(patterns)  # 전부 찾으면 스캔 중단
+        try:
+            db, scratch = _hs_scratch(patterns)
+            # UTF-8 모드는 올바른 UTF-8만 받으므로 짝 없는 서로게이트는 ?로 바꿈 (룰 존재 여부만 보므로 오프셋은 무관)
+            db.scan(text.encode("utf-8", "replace"), match_event_handler=on_match, scratch=scratch)
+        except hyperscan.ScanTerminated:
+            pass
+        return hits
+    return set(_re2_set(patterns).Match(text) or [])
+
+def prefilter_rules(text: str, rules: List[Rule]) -> List[Rule]:
+    # 숫자가 하나도 없거나 필수 리터럴(예: 이메일의 @)이 없으면 해당 룰은 스캔하지 않음
+    has_digit = _DIGIT_RE.search(text) is not None
+    rules = [
+        r for r in rules
+        if (has_digit or not r.needs_digit) and (not r.literals or any(lit in text for lit in r.literals))
+    ]
+    if re2 is None and hyperscan is None:
+        return rules
+    pats = [_prefilter_pattern(r) for r in rules]
+    idx = [i for i, p in enumerate(pats) if p is not None]
+    if not idx:
+        return rules
+    hits = _present_patterns(text, tuple(pats[i] for i in idx))
+    absent = set(idx) - {idx[h] for h in hits}
+    return [r for i, r in enumerate(rules) if i not in absent]
+
+# 계좌 키워드 위치 (start, end). ahocorasick_rs가 있으면 소문자화한 텍스트를 Aho-Corasick으로 한 번에 훑음.
+# 소문자화로 길이가 바뀌는 문자(예: 'İ')가 있으면 인덱스가 어긋나므로 정규식으로 처리
+@st.cache_resource(show_spinner=False)
+def _acct_automaton():
+    return ahocorasick_rs.AhoCorasick(list(ACCT_KEYWORDS), matchkind=ahocorasick_rs.MatchKind.LeftmostFirst)
+
+def iter_acct_keywords(text: str) -> Iterator[Tuple[int, int]]:
+    if ahocorasick_rs is not None:
+        low = text.lower()
+        if len(low) == len(text):
+            for _, ks, ke in _acct_automaton().find_matches_as_indexes(low):
+                yield ks, ke
+            return
+    for km in KEYWORD_ACCT.finditer(text):
+        yield km.span()
+
+# 키워드가 지정된 룰은 키워드 뒤 window에서 시작하는 매치만 통과시키는 룰로 바꿔 돌려줌.
+# 텍스트에 키워드가 아예 없으면 룰을 빼서 스캔·검증(룬 등) 비용 자체를 없앤다
+def apply_keyword_gate(text: str, rules: List[Rule]) -> List[Rule]:
+    gated: List[Rule] = []
     for r in rules:
-        for m in r.pattern.finditer(text):
-            if r.validator and not r.validator(m):
+        if r.keyword is None:
+            gated.append(r)
+            continue
+        if r.keyword is KEYWORD_ACCT:
+            kw_ends = [ke for _, ke in iter_acct_keywords(text)]
+        else:
+            kw_ends = [km.end() for km in r.keyword.finditer(text)]
+        if not kw_ends:
+            continue
+        def near(m: re.Match, kw_ends=kw_ends, window=r.keyword_window, validator=r.validator) -> bool:
+            k = bisect.bisect_right(kw_ends, m.start()) - 1
+            return k >= 0 and m.start() - kw_ends[k] < window and (validator is None or validator(m))
+        gated.append(replace(r, validator=near))
+    return gated
+
+# 매치가 시작될 수 있는 문자로 시작하는 ASCII(+ 구분 공백) 연속 구간 (한글 본문 같은 비ASCII 구간은 C 수준에서 건너뜀)
+_HOT_SLAB_RE = re.compile(r"[0-9A-Za-z._%+\-][\x00-\x7f" + _UNICODE_SPACES + "]*")
+
+# 검증(룬 등)에 실패한 매치는 같은 시작 위치에서 endpos를 줄여 더 짧은 매치를 다시 찾음
+# (예: 카드 뒤에 붙은 "02"까지 18자리로 잡혀 실패해도 앞의 16자리 카드는 검출).
+# endpos에서 끝난 매치의 \b는 잘린 텍스트의 끝으로 판정된 것이므로 전체 텍스트에서도 경계인지 확인 (룰 패턴은 모두 \b로 끝남)
+_BOUNDARY_RE = re.compile(r"\b")
+_BOUNDARY_ASCII_RE = re.compile(r"\b", re.ASCII)
+
+def _validated_match(text: str, r: Rule, s: int, m: re.Match) -> Optional[re.Match]:
+    boundary = _BOUNDARY_ASCII_RE if r.pattern.flags & re.ASCII else _BOUNDARY_RE
+    while r.validator and not r.validator(m):
+        e = m.end() - 1
+        while True:
+            m = r.pattern.match(text, s, e)
+            if m is None:
+                return None
+            if m.end() < e or boundary.match(text, e):
+                break
+            e -= 1
+    return m
+
+# 합친 패턴으로 텍스트를 한 번만 훑으며 겹치지 않는 (룰, 매치)를 왼쪽부터 돌려줌.
+# 같은 위치에서는 가장 짧은 매치(동률이면 앞선 룰)를 고른다(표기용).
+# longest=True면 가장 긴 매치를 골라, 대체 시 짧은 매치(예: 계좌)가 긴 매치(예: 카드)의 뒷부분을 남기지 않게 함.
+# 한 위치에서 어떤 룰도 채택되지 않으면 검증에 실패한 룰은 그 매치 끝 전에는 다시 시도하지 않음
+# (룬 검증에 실패한 숫자열 중간에서 카드 매치가 다시 시작돼 옆의 전화번호 등을 삼키지 않도록).
+# 다른 룰의 매치가 채택되면 실패한 후보가 끊긴 것이므로 그 뒤에서는 다시 시도
+# (전화번호·주민번호부터 이어 잡혀 실패한 카드 후보가 바로 뒤의 실제 카드를 가리지 않도록)
+
+def iter_rule_matches(text: str, rules: List[Rule], longest: bool = False) -> Iterator[Tuple[Rule, re.Match]]:
+    rules = prefilter_rules(text, rules)
+    if not rules:
+        return
+    combined = build_combined(rules)
+    which = build_combined(rules, named=True)
+    resume = [0] * len(rules)
+    # 모든 룰의 매치가 _HOT_SLAB_RE 구간 안에 들어가면 그 구간 안에서만 찾는다.
+    # endpos는 구간 뒤 비ASCII 한 글자까지 포함해 \b 판정이 전체 텍스트와 같게 유지
+    if all(r.in_hot_slab for r in rules):
+        slabs = ((hm.start(), hm.end() + 1) for hm in _HOT_SLAB_RE.finditer(text))
+    else:
+        slabs = ((0, len(text)),)
+    pos = 0
+    for a, b in slabs:
+        pos = max(pos, a)
+        while True:
+            cm = combined.search(text, pos, b)
+            if cm is None:
+                break
+            s = cm.start()
+            best: Optional[Tuple[Rule, re.Match]] = None
+            rejected: List[Tuple[int, int]] = []
+            # alternation은 앞 대안부터 시도하므로 lastgroup 이전 룰은 s에서 매치되지 않음 → 그 룰부터 확인
+            for i in range(int(which.match(text, s).lastgroup[1:]), len(rules)):
+                if s < resume[i]:
+                    continue
+                r = rules[i]
+                m = r.pattern.match(text, s)
+                if m is None:
+                    continue
+                vm = _validated_match(text, r, s, m)
+                if vm is None:
+                    rejected.append((i, m.end()))
+                    continue
+                if best is None or (vm.end() > best[1].end() if longest else vm.end() < best[1].end()):
+                    best = (r, vm)
+            if best is None:
+                for i, e in rejected:
+                    resume[i] = e
+                pos = s + 1
                 continue
-            s, e = m.span()
-            spans.append(Span(r.name, s, e))
-
-    # 계좌: 키워드 뒤 window에서만
+            yield best
+            pos = best[1].end()
+            resume = [0] * len(rules)
+
+# 옵션에 따라 실제로 스캔할 룰 목록 (검출·대체 공통).
+# 키워드 근접 룰도 같은 단일 스캔에 넣어 별도 window 스캔·정렬·겹침 제거가 필요 없음
+# (같은 위치·길이면 앞선 룰 우선이므로 맨 뒤에 붙임)
+def scan_rules(text: str, rules: List[Rule], use_account_near_keyword: bool = True, account_window: int = 50, use_crn_keyword: bool = False, use_card_dl_keyword: bool = False) -> List[Rule]:
+    if use_card_dl_keyword:
+        rules = apply_keyword_gate(text, rules)
+    near: List[Rule] = []
     if use_account_near_keyword:
-        for km in KEYWORD_ACCT.finditer(text):
-            ks, ke = km.span()
-            wend = min(len(text), ke + account_window)
-            for am in PAT_ACCT_NUM.finditer(text, ke, wend):
-                spans.append(Span("계좌(키워드근접)", am.start(), am.end()))
-
-    # (선택) 법인등록번호 키워드 근접 강화
+        near.append(replace(ACCOUNT_RULE, keyword_window=account_window))
     if use_crn_keyword:
-        for km in KEYWORD_CRN.finditer(text):
-            ks, ke = km.span()
-            wend = min(len(text), ke + 50)
-            for cm in PAT_CRN.finditer(text, ke, wend):
-                if looks_like_rrn_ymd(cm.group(0)):
-                    continue
-                spans.append(Span("법인등록번호(CRN)", cm.start(), cm.end()))
+        near.append(CRN_KEYWORD_RULE)
+    if near:
+        rules = list(rules) + apply_keyword_gate(text, near)
+    return rules
 
-    # 겹침 제거
-    spans.sort(key=lambda x: (x.start, x.end))
-    filtered: List[Span] = []
-    last = -1
-    for sp in spans:
-        if sp.start >= last:
-            filtered.append(sp)
-            last = sp.end
-    return filtered
+def find_spans(text: str, rules: List[Rule], use_account_near_keyword: bool = True, account_window: int = 50, use_crn_keyword: bool = False, use_card_dl_keyword: bool = False) -> List[Span]:
+    rules = scan_rules(text, rules, use_account_near_keyword, account_window, use_crn_keyword, use_card_dl_keyword)
+    return [Span(r.name, m.start(), m.end()) for r, m in iter_rule_matches(text, rules)]
 
 # HTML 표기
+_HTML_SPECIAL_RE = re.compile(r"[&<>]")
+
 def escape_html(s: str) -> str:
     return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
 
+_MARK_STYLE = "padding:0 .2em;border-radius:.2em"
+
+def _mark_open(label: str, color: str) -> str:
+    return f'<mark style="background:{color};{_MARK_STYLE}" title="{label}">'
+
+# 룰별 CSS 클래스: <style> 블록 하나에 색상을 모으고 구간마다 짧은 class 태그만 붙임 (활성 룰 조합별로 한 번만 생성)
+@functools.lru_cache(maxsize=8)
+def _mark_classes(rule_key: Tuple[Tuple[str, str], ...]) -> Tuple[str, Dict[str, str]]:
+    cmap = dict(rule_key)
+    cmap[ACCOUNT_RULE.name] = ACCOUNT_RULE.color
+    style = f"mark[class^=pii]{{{_MARK_STYLE}}}" + "".join(f"mark.pii{i}{{background:{color}}}" for i, color in enumerate(cmap.values()))
+    tags = {label: f'<mark class="pii{i}" title="{label}">' for i, label in enumerate(cmap)}
+    return f"<style>{style}</style>", tags
+
 def annotate_html(text: str, spans: List[Span], rules: List[Rule]) -> str:
-    cmap = {r.name: r.color for r in rules}
-    cmap["계좌(키워드근접)"] = "#ffe082"
-    html, i = [], 0
+    style, tags = _mark_classes(tuple((r.name, r.color) for r in rules))
+    # &, <, > 가 없는 텍스트는 조각마다 이스케이프할 필요 없음 (전체에서 한 번만 확인)
+    esc = escape_html if _HTML_SPECIAL_RE.search(text) else str
+    html, i = [style] if spans else [], 0
     for sp in spans:
-        html.append(escape_html(text[i:sp.start]))
-        label = sp.rname
-        color = cmap.get(label, "#ffd54f")
-        chunk = escape_html(text[sp.start:sp.end])
-        html.append(f'<mark style="background:{color};padding:0 .2em;border-radius:.2em" title="{label}">{chunk}</mark>')
+        tag = tags.get(sp.rname) or _mark_open(sp.rname, "#ffd54f")
+        # 앞 구간과 하이라이트를 한 조각으로 (리스트 길이 절반)
+        html.append(f"{esc(text[i:sp.start])}{tag}{esc(text[sp.start:sp.end])}</mark>")
         i = sp.end
-    html.append(escape_html(text[i:]))
+    html.append(esc(text[i:]))
     return "".join(html)
 
 # 텍스트 대체
-def replace_text(text: str, rules: List[Rule], use_account_near_keyword: bool = True, account_window: int = 50) -> str:
-    out = text
-    for r in rules:
-        if r.mask_fn is None:
-            continue
-        def repl(m: re.Match) -> str:
-            if r.validator and not r.validator(m):
-                return m.group(0)
-            return r.mask_fn(m)
-        out = r.pattern.sub(repl, out)
-
-    if use_account_near_keyword:
-        res, i = [], 0
-        while i < len(out):
-            km = KEYWORD_ACCT.search(out, i, min(len(out), i + 800))
-            if not km:
-                res.append(out[i:]); break
-            ks, ke = km.span()
-            res.append(out[i:ks]); res.append(out[ks:ke])
-            wend = min(len(out), ke + account_window)
-            win = out[ke:wend]
-            win = PAT_ACCT_NUM.sub(lambda m: f"ACCT[{keep_tail_mask(re.sub(r'\\D','', m.group(0)), 4)}]", win)
-            res.append(win)
-            i = wend
-        out = "".join(res) if res else out
-
-    return out
+def replace_text(text: str, rules: List[Rule], use_account_near_keyword: bool = True, account_window: int = 50, use_card_dl_keyword: bool = False) -> str:
+    rules = scan_rules(text, [r for r in rules if r.mask_fn is not None], use_account_near_keyword, account_window, use_card_dl_keyword=use_card_dl_keyword)
+    # 검출과 같은 단일 스캔(계좌 키워드 근접 포함)으로 매치 구간을 바로 마스킹해 한 번에 출력.
+    # 같은 위치에서는 가장 긴 매치를 마스킹 (하이라이트의 가장 짧은 매치를 따르면 카드 뒷자리가 남을 수 있음)
+    res, i = [], 0
+    for r, m in iter_rule_matches(text, rules, longest=True):
+        res.append(text[i:m.start()])
+        res.append(r.mask_fn(m))
+        i = m.end()
+    res.append(text[i:])
+    return "".join(res)
+
+# ---------- 결과 캐시 ----------
+# 위젯 조작으로 스크립트가 다시 실행돼도 같은 텍스트·옵션이면 검출/표기/대체를 다시 하지 않음.
+# 룰은 이름(기본 룰 순서)으로 식별하고, 구간은 피클이 단순한 (rname, start, end) 튜플로 저장
+def _rules_by_name(rule_names: Tuple[str, ...]) -> List[Rule]:
+    return [r for r in _DEFAULT_RULES if r.name in rule_names]
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_spans(text: str, rule_names: Tuple[str, ...], use_card_dl_keyword: bool) -> List[Tuple[str, int, int]]:
+    spans = find_spans(text, _rules_by_name(rule_names), use_account_near_keyword=True, account_window=50, use_card_dl_keyword=use_card_dl_keyword)
+    return [tuple(sp) for sp in spans]
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_html(text: str, rule_names: Tuple[str, ...], use_card_dl_keyword: bool) -> str:
+    spans = [Span(*sp) for sp in cached_spans(text, rule_names, use_card_dl_keyword)]
+    return annotate_html(text, spans, _rules_by_name(rule_names))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_redacted(text: str, rule_names: Tuple[str, ...], use_card_dl_keyword: bool) -> str:
+    return replace_text(text, _rules_by_name(rule_names), use_account_near_keyword=True, account_window=50, use_card_dl_keyword=use_card_dl_keyword)
 
 # ---------- UI ----------
 st.set_page_config(page_title="민감정보 표기·대체 도구", layout="wide")
@@ -255,70 +530,74 @@ with left:
 
     enabled_names = st.multiselect(
         "적용할 규칙 선택",
-        [r.name for r in rules_all],
-        default=[r.name for r in rules_all],
+        DEFAULT_RULE_NAMES,
+        default=DEFAULT_RULE_NAMES,
     )
 
+    card_dl_keyword = st.checkbox("카드번호·운전면허는 키워드(카드, 면허 등) 근처에서만 검출", value=False)
 
-with right:
-    st.subheader("② 결과")
 
+# 결과 영역은 fragment로 분리: 출력 모드 전환·실행 버튼은 이 영역만 다시 실행.
+# 실행 시점의 입력을 session_state에 저장해 두고, 모드를 바꿔도 그 입력의 (캐시된) 결과를 다시 그림
+@st.fragment
+def render_results(base_text: str, rule_names: Tuple[str, ...], card_dl_keyword: bool) -> None:
     # 출력 모드와 실행 버튼을 오른쪽 위에 배치
     mode = st.radio("출력 모드", ["표기(하이라이트)", "대체(마스킹)"], horizontal=True)
-    run = st.button("🚀 실행")
+    if st.button("🚀 실행"):
+        st.session_state["last_run"] = (base_text, rule_names, card_dl_keyword)
 
-    if not run:
+    last_run = st.session_state.get("last_run")
+    if last_run is None:
         st.info("왼쪽에서 텍스트를 입력하고 **실행** 버튼을 누르세요.")
+        return
+    # 실행 후 텍스트·규칙·옵션이 바뀌었으면 지난 결과(다운로드 포함)를 현재 입력의 결과처럼 보이지 않게 함
+    if last_run != (base_text, rule_names, card_dl_keyword):
+        st.info("입력이나 옵션이 바뀌었습니다. **실행** 버튼을 눌러 결과를 갱신하세요.")
+        return
+    text, rule_names, card_dl_keyword = last_run
+    if not text.strip():
+        st.warning("텍스트를 입력하세요.")
+        return
+
+    # 계좌 키워드 window는 50으로 고정 (cached_* 참고)
+    spans = [Span(*sp) for sp in cached_spans(text, rule_names, card_dl_keyword)]
+
+    if spans:
+        counts = {}
+        for sp in spans:
+            counts[sp.rname] = counts.get(sp.rname, 0) + 1
+        st.write("**검출 요약**")
+        st.write(", ".join([f"{k}: {v}건" for k, v in counts.items()]))
     else:
-        if not base_text.strip():
-            st.warning("텍스트를 입력하세요.")
-        else:
-            rules = [r for r in rules_all if r.name in enabled_names]
-
-            spans = find_spans(
-                base_text,
-                rules,
-                use_account_near_keyword=True,
-                account_window=50,  # 고정
-            )
-
-            if spans:
-                counts = {}
-                for sp in spans:
-                    counts[sp.rname] = counts.get(sp.rname, 0) + 1
-                st.write("**검출 요약**")
-                st.write(", ".join([f"{k}: {v}건" for k, v in counts.items()]))
-            else:
-                st.write("검출된 항목 없음")
-
-            if mode == "표기(하이라이트)":
-                html = annotate_html(base_text, spans, rules)
-                st.markdown(
-                    "<div style='white-space:pre-wrap; font-family:ui-monospace, Menlo, Consolas, monospace; line-height:1.6;'>"
-                    + html +
-                    "</div>",
-                    unsafe_allow_html=True,
-                )
-                st.download_button(
-                    "현재 결과(하이라이트 HTML) 다운로드",
-                    html,
-                    file_name="annotated.html",
-                    mime="text/html",
-                )
-            else:
-                redacted = replace_text(
-                    base_text,
-                    rules,
-                    use_account_near_keyword=True,
-                    account_window=50,
-                )
-                st.text_area("마스킹 결과", value=redacted, height=360)
-                st.download_button(
-                    "마스킹 결과 TXT 다운로드",
-                    redacted,
-                    file_name="sanitized.txt",
-                    mime="text/plain",
-                )
+        st.write("검출된 항목 없음")
+
+    if mode == "표기(하이라이트)":
+        html = cached_html(text, rule_names, card_dl_keyword)
+        st.markdown(
+            "<div style='white-space:pre-wrap; font-family:ui-monospace, Menlo, Consolas, monospace; line-height:1.6;'>"
+            + html +
+            "</div>",
+            unsafe_allow_html=True,
+        )
+        st.download_button(
+            "현재 결과(하이라이트 HTML) 다운로드",
+            html,
+            file_name="annotated.html",
+            mime="text/html",
+        )
+    else:
+        redacted = cached_redacted(text, rule_names, card_dl_keyword)
+        st.text_area("마스킹 결과", value=redacted, height=360)
+        st.download_button(
+            "마스킹 결과 TXT 다운로드",
+            redacted,
+            file_name="sanitized.txt",
+            mime="text/plain",
+        )
+
+with right:
+    st.subheader("② 결과")
+    render_results(base_text, tuple(r.name for r in rules_all if r.name in enabled_names), card_dl_keyword)
 
 
 # ==================================
@@ -329,8 +608,10 @@ if False:
     from dataclasses import dataclass, asdict
     from typing import List, Optional, Callable
 
+    _NON_DIGIT_RE = re.compile(r"\D")
+
     def luhn_check(num: str) -> bool:
-        ds = [int(d) for d in re.sub(r"\D", "", num)]
+        ds = [int(d) for d in _NON_DIGIT_RE.sub("", num)]
         if len(ds) < 13: return False
         s, alt = 0, False
         for d in reversed(ds):
@@ -340,7 +621,7 @@ if False:
         return s % 10 == 0
 
     def brn_check(num: str) -> bool:
-        ds = [int(d) for d in re.sub(r"\D", "", num)]
+        ds = [int(d) for d in _NON_DIGIT_RE.sub("", num)]
         if len(ds) != 10: return False
         w = [1,3,7,1,3,7,1,3,5]
         s = sum(d*w[i] for i,d in enumerate(ds[:9]))
@@ -349,7 +630,7 @@ if False:
         return check == ds[9]
 
     def looks_like_rrn_ymd(num13: str) -> bool:
-        n = re.sub(r"\D", "", num13)
+        n = _NON_DIGIT_RE.sub("", num13)
         if len(n) != 13: return False
         mm = int(n[2:4]); dd = int(n[4:6])
         return 1 <= mm <= 12 and 1 <= dd <= 31
@@ -435,8 +716,11 @@ if False:
 if False:
     import re, argparse
 
+    _NON_DIGIT_RE = re.compile(r"\D")
+    _WS_RE = re.compile(r"\s")
+
     def luhn_check(num: str) -> bool:
-        ds = [int(d) for d in re.sub(r"\D", "", num)]
+        ds = [int(d) for d in _NON_DIGIT_RE.sub("", num)]
         if len(ds) < 13: return False
         s, alt = 0, False
         for d in reversed(ds):
@@ -446,11 +730,11 @@ if False:
         return s % 10 == 0
 
     def keep_tail_mask(s: str, keep: int = 4, mask_char: str = "*") -> str:
-        s2 = re.sub(r"\s", "", s)
+        s2 = _WS_RE.sub("", s)
         return (mask_char * (len(s2) - keep) + s2[-keep:]) if len(s2) > keep else s
 
     def brn_check(num: str) -> bool:
-        ds = [int(d) for d in re.sub(r"\D", "", num)]
+        ds = [int(d) for d in _NON_DIGIT_RE.sub("", num)]
         if len(ds) != 10: return False
         w = [1,3,7,1,3,7,1,3,5]
         s = sum(d*w[i] for i,d in enumerate(ds[:9]))
@@ -459,7 +743,7 @@ if False:
         return check == ds[9]
 
     def looks_like_rrn_ymd(num13: str) -> bool:
-        n = re.sub(r"\D", "", num13)
+        n = _NON_DIGIT_RE.sub("", num13)
         if len(n) != 13: return False
         mm = int(n[2:4]); dd = int(n[4:6])
         return 1 <= mm <= 12 and 1 <= dd <= 31
@@ -482,10 +766,10 @@ if False:
 
     # 마스킹 함수
     def mask_mobile(m: re.Match) -> str:
-        tail2 = re.sub(r"\D", "", m.group(0))[-2:]
+        tail2 = _NON_DIGIT_RE.sub("", m.group(0))[-2:]
         return f"TEL[***-****-**{tail2}]"
     def mask_landline(m: re.Match) -> str:
-        area = m.group(1); tail2 = re.sub(r"\D", "", m.group(0))[-2:]
+        area = m.group(1); tail2 = _NON_DIGIT_RE.sub("", m.group(0))[-2:]
         return f"TEL[{area}-***-**{tail2}]"
     def mask_rrn(m: re.Match) -> str:
         return f"RRN[******-***{m.group(0)[-4:]}]"
@@ -494,15 +778,15 @@ if False:
         masked_local = (local[0] + "*"*(len(local)-1)) if len(local) > 1 else "*"
         return f"EMAIL[{masked_local}@{domain}]"
     def mask_card(m: re.Match) -> str:
-        return (f"CARD[**** **** **** {re.sub(r'\\D','',m.group(0))[-4:]}]" if luhn_check(m.group(0)) else m.group(0))
+        return (f"CARD[**** **** **** {_NON_DIGIT_RE.sub('', m.group(0))[-4:]}]" if luhn_check(m.group(0)) else m.group(0))
     def mask_passport(m: re.Match) -> str:
         return f"PP[{keep_tail_mask(m.group(0),3)}]"
     def mask_driver(m: re.Match) -> str:
-        return f"DL[{keep_tail_mask(re.sub(r'\\D','',m.group(0)),2)}]"
+        return f"DL[{keep_tail_mask(_NON_DIGIT_RE.sub('', m.group(0)),2)}]"
     def mask_brn(m: re.Match) -> str:
-        return f"BRN[***-**-**{re.sub(r'\\D','', m.group(0))[-3:]}]"
+        return f"BRN[***-**-**{_NON_DIGIT_RE.sub('', m.group(0))[-3:]}]"
     def mask_crn(m: re.Match) -> str:
-        raw = re.sub(r"\D", "", m.group(0))
+        raw = _NON_DIGIT_RE.sub("", m.group(0))
         return f"CRN[******-****{raw[-3:]}]"
     def mask_project(m: re.Match) -> str:
         raw = m.group(0)
@@ -528,18 +812,18 @@ if False:
             def repl(m):
                 return fn(m) if (validator is None or validator(m)) else m.group(0)
             out = pat.sub(repl, out)
-        # 계좌(키워드 근접)
+        # 계좌(키워드 근접): 키워드를 finditer 한 번으로 훑음 (800자 단위로 끊어 찾으면 그 안에 키워드가 없을 때 나머지를 통째로 놓침)
         res, i = [], 0
-        while i < len(out):
-            km = KEYWORD_ACCT.search(out, i, min(len(out), i+800))
-            if not km:
-                res.append(out[i:]); break
-            ks, ke = km.span(); res.append(out[i:ks]); res.append(out[ks:ke])
+        for km in KEYWORD_ACCT.finditer(out):
+            ks, ke = km.span()
+            if ks < i:  # 직전 window 안의 키워드는 이미 처리됨
+                continue
             wend = min(len(out), ke+50)
-            win = out[ke:wend]
-            win = ACCT_NUMBER.sub(lambda m: f"ACCT[{keep_tail_mask(re.sub(r'\\D','',m.group(0)),4)}]", win)
-            res.append(win); i = wend
-        return "".join(res) if res else out
+            res.append(out[i:ke])
+            res.append(ACCT_NUMBER.sub(lambda m: f"ACCT[{keep_tail_mask(_NON_DIGIT_RE.sub('', m.group(0)),4)}]", out[ke:wend]))
+            i = wend
+        res.append(out[i:])
+        return "".join(res)
 
     def main():
         ap = argparse.ArgumentParser(description="텍스트 내 민감정보 대체")